@@ -0,0 +1,107 @@
+"""
+evdev_gamepad.py
+
+绕过 pygame/SDL，直接从 /dev/input/eventN 读取手柄摇杆事件。
+使用边沿触发的 epoll 在内核中阻塞等待，有事件时一次读空设备缓冲区，
+并把原始轴值归一化到 [-1.0, 1.0]，与 pygame 的轴值范围保持一致。
+
+注意：
+    - 运行用户需要对 /dev/input/eventN 有读权限（或使用 sudo）。
+    - 可通过 `cat /proc/bus/input/devices` 或 evtest 查看手柄对应的 eventN。
+"""
+
+import os
+import fcntl
+import select
+import struct
+import numpy as np
+
+# ——————————————————————————————————————————————————————————————————————————————————
+# linux/input-event-codes.h
+EV_ABS = 0x03
+ABS_X  = 0x00   # 左摇杆横向
+ABS_Y  = 0x01   # 左摇杆纵向
+ABS_RX = 0x03   # 右摇杆横向
+ABS_RY = 0x04   # 右摇杆纵向
+ABS_CNT = 0x40
+
+# struct input_event: struct timeval (sec, usec) + type + code + value
+# 用结构化 dtype 直接解释 read 得到的字节，一批事件按字段连续存放，无需逐个 unpack
+_INPUT_EVENT = np.dtype([('sec', 'l'), ('usec', 'l'), ('type', 'u2'), ('code', 'u2'), ('value', 'i4')])
+# struct input_absinfo: value, minimum, maximum, fuzz, flat, resolution
+_INPUT_ABSINFO = struct.Struct('6i')
+
+_READ_BATCH = 64  # 每次 read 最多读取的事件数
+# ——————————————————————————————————————————————————————————————————————————————————
+
+
+def _eviocgabs(code: int) -> int:
+    """EVIOCGABS(code) = _IOR('E', 0x40 + code, struct input_absinfo)"""
+    return (2 << 30) | (_INPUT_ABSINFO.size << 16) | (ord('E') << 8) | (0x40 + code)
+
+
+class EvdevGamepad:
+    def __init__(self, device_path: str, axis_map: dict):
+        """
+        打开 evdev 手柄设备
+
+        Args:
+            device_path (str): 手柄对应的 evdev 设备，例如 /dev/input/event2
+            axis_map (dict): evdev 轴代码 -> 轴编号，例如 {ABS_X: 0, ABS_RY: 3}
+                             未列出的轴事件将被忽略
+        """
+        self._fd = os.open(device_path, os.O_RDONLY | os.O_NONBLOCK)
+        self._epoll = select.epoll()
+        self._epoll.register(self._fd, select.EPOLLIN | select.EPOLLET)
+
+        # 按 evdev 轴代码建立查找表：轴编号 (-1 表示忽略该轴)、最小值、归一化缩放系数
+        self._axis_of_code = np.full(ABS_CNT, -1, dtype=np.int16)
+        self._min_of_code = np.zeros(ABS_CNT)
+        self._scale_of_code = np.zeros(ABS_CNT)
+        for code, axis in axis_map.items():
+            absinfo = fcntl.ioctl(self._fd, _eviocgabs(code), bytes(_INPUT_ABSINFO.size))
+            _, minimum, maximum, _, _, _ = _INPUT_ABSINFO.unpack(absinfo)
+            self._axis_of_code[code] = axis
+            self._min_of_code[code] = minimum
+            self._scale_of_code[code] = 2.0 / (maximum - minimum)
+
+        # 预分配的读缓冲区，每次 read 直接写入，不再为每批事件分配新的 bytes
+        self._buf = bytearray(_INPUT_EVENT.itemsize * _READ_BATCH)
+
+    def read_axes(self, timeout: float = -1) -> list:
+        """
+        阻塞等待摇杆轴事件
+
+        Args:
+            timeout (float): 最长等待时间 (秒)，-1 表示一直等待
+
+        Returns:
+            list: [(轴编号, 轴值), ...]，轴值范围 [-1.0, 1.0]；超时返回空列表
+        """
+        axis_events = []
+        if not self._epoll.poll(timeout):
+            return axis_events
+
+        # 边沿触发：必须一次读空，否则不会再收到通知
+        while True:
+            try:
+                nbytes = os.readv(self._fd, [self._buf])
+            except BlockingIOError:
+                break
+
+            events = np.frombuffer(self._buf, dtype=_INPUT_EVENT, count=nbytes // _INPUT_EVENT.itemsize)
+            abs_events = events[events['type'] == EV_ABS]
+            codes = abs_events['code']
+            axes = self._axis_of_code[codes]
+            wanted = axes >= 0
+            codes = codes[wanted]
+            values = (abs_events['value'][wanted] - self._min_of_code[codes]) * self._scale_of_code[codes] - 1.0
+            # 缓冲区下次 read 会被覆盖，这里转换成 Python 对象后再继续读取
+            axis_events.extend(zip(axes[wanted].tolist(), values.tolist()))
+
+        return axis_events
+
+    def close(self):
+        """关闭设备"""
+        self._epoll.close()
+        os.close(self._fd)
@@ -1,10 +1,156 @@
 import Jetson.GPIO as GPIO
+import os
 import time
 import atexit
+import threading
 from typing import Optional, Union
 
+# 使用 _HwPwm (后台线程异步写入占空比) 的引脚: BOARD编号 -> (pwmchip 目录, 通道号)
+# Jetson.GPIO 的 GPIO.PWM 本身也是硬件PWM，会按板卡自动查找 pwmchip；
+# 此表只供 _HwPwm 使用，需与 Jetson.GPIO 对该板卡的 PWM 引脚定义及 /sys/class/pwm
+# 下的实际情况一致 (pwmchip 编号随 Jetson 型号/JetPack 版本可能不同)
+HW_PWM_PINS = {
+    15: ("/sys/class/pwm/pwmchip0", 0),
+}
+
+
+class _HwPwm:
+    """
+    通过 /sys/class/pwm 驱动硬件 PWM，接口与 GPIO.PWM 保持一致。
+    与 GPIO.PWM 使用同一个 PWM 控制器，区别只在于占空比由后台线程写入，
+    调用方不会阻塞在 PWM 驱动上；
+    换向前停车等安全操作使用 ChangeDutyCycleSync 同步写入。
+    """
+
+    def __init__(self, chip: str, channel: int, frequency: int):
+        """
+        Args:
+            chip (str): pwmchip 目录，例如 /sys/class/pwm/pwmchip0
+            channel (int): PWM 通道号
+            frequency (int): PWM频率 (Hz)
+        """
+        self._chip = chip
+        self._channel = channel
+        self._period_ns = int(1_000_000_000 / frequency)
+
+        path = f"{chip}/pwm{channel}"
+        if not os.path.exists(path):
+            with open(f"{chip}/export", 'w') as f:
+                f.write(str(channel))
+            time.sleep(0.1)  # 等待设备创建
+
+        self._period_fd = os.open(f"{path}/period", os.O_WRONLY)
+        self._duty_fd = os.open(f"{path}/duty_cycle", os.O_WRONLY)
+        self._enable_fd = os.open(f"{path}/enable", os.O_WRONLY)
+
+        # 先清零占空比，避免新周期小于旧占空比时写入失败
+        self._write(self._duty_fd, 0)
+        self._write(self._period_fd, self._period_ns)
+
+        # 事件线程与后台写入线程之间的单槽位
+        self._cv = threading.Condition()
+        self._pending_duty_ns: Optional[int] = None
+        self._writing = False  # 后台线程正在锁外写入 sysfs
+        self._write_error: Optional[OSError] = None  # 后台写入失败的异常，下次调用时抛给调用方
+        self._closing = False
+        self._writer: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _write(fd: int, value: int):
+        os.write(fd, str(value).encode())
+        os.lseek(fd, 0, os.SEEK_SET)
+
+    def start(self, duty_cycle: float):
+        """以指定占空比 (%) 启动PWM输出，并启动后台写入线程"""
+        self._write(self._duty_fd, self._duty_ns(duty_cycle))
+        self._write(self._enable_fd, 1)
+
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def ChangeDutyCycle(self, duty_cycle: float):
+        """
+        设置占空比 (%)。
+        只把目标值放入单槽位后立即返回，由后台线程写入 sysfs；
+        后台线程来不及写入时，新值直接覆盖旧值，只写最新的占空比。
+        之前的后台写入失败时，新值照常提交，随后抛出该写入错误。
+        """
+        with self._cv:
+            self._pending_duty_ns = self._duty_ns(duty_cycle)
+            self._cv.notify_all()
+            self._raise_write_error()
+
+    def ChangeDutyCycleSync(self, duty_cycle: float):
+        """
+        立即写入占空比 (%)，返回时已写入 sysfs。
+        丢弃尚未写入的目标值，并等待后台线程完成正在进行的写入，
+        保证之后不会再有旧的占空比覆盖本次写入；用于换向前停车等安全操作。
+        """
+        with self._cv:
+            self._pending_duty_ns = None
+            self._cv.wait_for(lambda: not self._writing)
+            # 持有锁写入，后台线程在此期间无法取出新的目标值
+            self._write(self._duty_fd, self._duty_ns(duty_cycle))
+            self._raise_write_error()
+
+    def _raise_write_error(self):
+        """抛出并清除后台线程记录的写入错误 (调用方需持有 self._cv)"""
+        error, self._write_error = self._write_error, None
+        if error is not None:
+            raise error
+
+    def _duty_ns(self, duty_cycle: float) -> int:
+        return int(self._period_ns * duty_cycle / 100)
+
+    def _write_loop(self):
+        """
+        后台写入线程：等待新的占空比并写入 sysfs (在锁外执行写入)
+        写入失败不会结束线程：记录异常后继续处理后续的占空比 (包括停止时的 0)
+        """
+        while True:
+            with self._cv:
+                self._cv.wait_for(lambda: self._pending_duty_ns is not None or self._closing)
+                duty_ns = self._pending_duty_ns
+                self._pending_duty_ns = None
+                if duty_ns is None:  # 已请求停止且没有待写入的值
+                    return
+                self._writing = True
+            error = None
+            try:
+                self._write(self._duty_fd, duty_ns)
+            except OSError as e:
+                print(f"错误: 写入PWM占空比失败: {e}")
+                error = e
+            finally:
+                with self._cv:
+                    self._writing = False
+                    if error is not None:
+                        self._write_error = error
+                    self._cv.notify_all()
+
+    def stop(self):
+        """写完最后一个占空比后停止PWM输出并释放通道；之后抛出未报告的后台写入错误"""
+        with self._cv:
+            self._closing = True
+            self._cv.notify_all()
+        if self._writer is not None:
+            self._writer.join()
+
+        try:
+            self._write(self._enable_fd, 0)
+        finally:
+            for fd in (self._period_fd, self._duty_fd, self._enable_fd):
+                os.close(fd)
+            with open(f"{self._chip}/unexport", 'w') as f:
+                f.write(str(self._channel))
+
+        with self._cv:
+            self._raise_write_error()
+
+
 class MotorController:
-    def __init__(self, pwm_pin: int = 15, dir_pin: int = 22, pwm_frequency: int = 1000):
+    def __init__(self, pwm_pin: int = 15, dir_pin: int = 22, pwm_frequency: int = 1000,
+                 pwm_chip: Optional[str] = None, pwm_channel: int = 0):
         """
         初始化电机控制器
         
@@ -12,18 +158,26 @@ class MotorController:
             pwm_pin (int): PWM信号引脚 (使用BOARD编号)
             dir_pin (int): 方向控制引脚 (使用BOARD编号)
             pwm_frequency (int): PWM频率 (Hz)
+            pwm_chip (str): PWM引脚对应的 sysfs pwmchip 目录，为 None 时按 HW_PWM_PINS 自动查找；
+                            找不到时使用 Jetson.GPIO 的 GPIO.PWM (同样是硬件PWM，占空比同步写入)
+            pwm_channel (int): pwmchip 下的通道号 (仅在指定 pwm_chip 时使用)
         """
+        if pwm_chip is None and pwm_pin in HW_PWM_PINS:
+            pwm_chip, pwm_channel = HW_PWM_PINS[pwm_pin]
+
         # 引脚配置
         self.PWM_PIN = pwm_pin
         self.DIR_PIN = dir_pin
         self.PWM_FREQUENCY = pwm_frequency
+        self.PWM_CHIP = pwm_chip
+        self.PWM_CHANNEL = pwm_channel
         
         # 方向常量 (如果您的H桥逻辑相反，请调整这些值)
         self.DIRECTION_FORWARD = GPIO.HIGH  # 正向
         self.DIRECTION_REVERSE = GPIO.LOW   # 反向
         
         # 内部状态
-        self._pwm_motor: Optional[GPIO.PWM] = None
+        self._pwm_motor: Optional[Union[_HwPwm, GPIO.PWM]] = None
         self._is_initialized = False
         self._current_direction = self.DIRECTION_FORWARD
         self._current_speed = 0
@@ -53,19 +207,24 @@ class MotorController:
             GPIO.output(self.DIR_PIN, self.DIRECTION_FORWARD)  # 默认方向为正向
             self._current_direction = self.DIRECTION_FORWARD
             
-            # 初始化PWM引脚
-            self._pwm_motor = GPIO.PWM(self.PWM_PIN, self.PWM_FREQUENCY)
+            # 初始化PWM: 已配置 pwmchip 的引脚使用 _HwPwm 异步写入占空比
+            if self.PWM_CHIP is not None:
+                self._pwm_motor = _HwPwm(self.PWM_CHIP, self.PWM_CHANNEL, self.PWM_FREQUENCY)
+            else:
+                print(f"提示: 引脚 {self.PWM_PIN} 未在 HW_PWM_PINS 中配置，使用 GPIO.PWM (占空比同步写入)")
+                self._pwm_motor = GPIO.PWM(self.PWM_PIN, self.PWM_FREQUENCY)
             self._pwm_motor.start(0)  # 以0%占空比启动PWM (电机停止)
             
             self._is_initialized = True
             print("电机控制引脚初始化成功")
             return True
             
-        except RuntimeError as e:
+        except (RuntimeError, OSError, ValueError) as e:
             print(f"错误: PWM初始化失败在引脚 {self.PWM_PIN}: {e}")
             print("请检查:")
             print("1. 是否使用 'sudo' 运行脚本")
             print(f"2. 引脚 {self.PWM_PIN} 和 {self.DIR_PIN} 是否被其他设备占用")
+            print(f"3. 引脚 {self.PWM_PIN} 是否为 PWM 引脚并已在 Jetson-IO 中启用 PWM 功能")
             self._safe_cleanup()
             return False
         except Exception as e:
@@ -93,7 +252,8 @@ class MotorController:
         # 如果需要改变方向，先停止电机以避免损坏
         if direction != self._current_direction and self._current_speed > 0:
             print("方向改变时自动停止电机以确保安全")
-            self._set_pwm_speed(0)
+            # 必须在切换方向引脚之前真正写入 0，不能交给后台线程合并
+            self._set_pwm_speed(0, sync=True)
             # time.sleep(0.1)  # 短暂延迟确保电机完全停止
         
         GPIO.output(self.DIR_PIN, direction)
@@ -224,10 +384,19 @@ class MotorController:
             return False
         return True
     
-    def _set_pwm_speed(self, speed: float):
-        """设置PWM占空比"""
+    def _set_pwm_speed(self, speed: float, sync: bool = False):
+        """
+        设置PWM占空比
+
+        Args:
+            speed (float): 占空比 (%)
+            sync (bool): 为 True 时返回前确保已写入硬件 (_HwPwm 默认由后台线程异步写入，GPIO.PWM 本身即同步写入)
+        """
         if self._pwm_motor:
-            self._pwm_motor.ChangeDutyCycle(speed)
+            if sync and isinstance(self._pwm_motor, _HwPwm):
+                self._pwm_motor.ChangeDutyCycleSync(speed)
+            else:
+                self._pwm_motor.ChangeDutyCycle(speed)
     
     def _safe_cleanup(self):
         """安全清理GPIO资源"""
@@ -1,9 +1,23 @@
+import os
 import time
-try:
-    import Jetson.GPIO as GPIO
-except ImportError:
-    print("Error: Jetson.GPIO library is not installed or unavailable.")
-    GPIO = None
+import atexit
+
+# Jetson.GPIO 在导入时会探测板卡型号，较慢；推迟到第一次控制方向引脚时再导入，
+# 只调速 (sysfs PWM) 的程序不需要加载它
+GPIO = None
+
+
+def _gpio():
+    """按需导入 Jetson.GPIO"""
+    global GPIO
+    if GPIO is None:
+        try:
+            import Jetson.GPIO as GPIO
+        except ImportError:
+            print("Error: Jetson.GPIO library is not installed or unavailable.")
+            raise
+    return GPIO
+
 
 # PWM sysfs 接口路径（取决于你的 Jetson 型号）
 PWM_CHIP = "/sys/class/pwm/pwmchip0"
@@ -11,55 +25,120 @@ PWM_CHANNEL = "pwm0"
 
 
 
+# 方向引脚是否已完成 setmode/setup
+_dir_initialized = False
+
+
 def control_direction(direction):
     """
     pin = 33  # Pin 33 is chosen as it corresponds to GPIO13 on the Jetson board, suitable for motor control.
     :param direction: 1 或 -1
     """
+    global _dir_initialized
     # 引脚13编号
     pin = 33
-    GPIO.setmode(GPIO.BOARD)  # 设置为BOARD编号模式
+    gpio = _gpio()
+    if not _dir_initialized:
+        gpio.setmode(gpio.BOARD)  # 设置为BOARD编号模式
+
+        # 设置为输出模式（只需配置一次）
+        gpio.setup(pin, gpio.OUT)
+        _dir_initialized = True
 
-    # 设置为输出模式
-    GPIO.setup(pin, GPIO.OUT)
     if direction == 1:
-        GPIO.output(pin, GPIO.HIGH)  # 设置 GPIO23 高电平
+        gpio.output(pin, gpio.HIGH)  # 设置 GPIO23 高电平
     elif direction == -1:
-        GPIO.output(pin, GPIO.LOW)   # 设置 GPIO23 低电平
+        gpio.output(pin, gpio.LOW)   # 设置 GPIO23 低电平
 
-# 初始化 PWM
-def init_pwm(duty, period=1000000):
-    """
-    duty: 占空比
-    period: PWM周期，默认为1000000 (1ms -> 1kHz)
-    """
+# 已打开的 sysfs 文件描述符，导出一次后复用，避免每次调速都重新 open/close
+_period_fd = None
+_duty_fd = None
+_enable_fd = None
+
+# PWM 输出是否已使能
+_pwm_enabled = False
+
+# 上一次写入的占空比，用于跳过重复写入
+_last_duty = None
+
+# 预先编码好的写入内容，避免每次写入都做 int -> str -> bytes 转换
+# set_speed 使用整数速度比例 (0-100) 时，占空比只有 101 种取值
+_DUTY_BYTES = {int(1000000 * i * 0.01): str(int(1000000 * i * 0.01)).encode() for i in range(101)}
+_ENABLE = b"1"
+_DISABLE = b"0"
+
+
+def _write_fd(fd, data):
+    """向已打开的 sysfs 节点写入 bytes，并将偏移复位以便下次写入"""
+    os.write(fd, data)
+    os.lseek(fd, 0, os.SEEK_SET)
+
+
+def _open_pwm(period):
+    """导出 PWM 通道并打开 period/duty_cycle/enable 节点"""
+    global _period_fd, _duty_fd, _enable_fd
     try:
         with open(f"{PWM_CHIP}/export", 'w') as f:
             f.write("0")
-    except FileNotFoundError:
-        pass  # 如果已经导出，忽略错误
+    except OSError:
         pass  # 如果已经导出，忽略错误
+    else:
+        time.sleep(0.1)  # 刚导出时等待设备创建；已导出的通道无需等待
 
-    time.sleep(0.1)  # 等待设备创建
+    _period_fd = os.open(f"{PWM_CHIP}/{PWM_CHANNEL}/period", os.O_WRONLY)
+    _duty_fd = os.open(f"{PWM_CHIP}/{PWM_CHANNEL}/duty_cycle", os.O_WRONLY)
+    _enable_fd = os.open(f"{PWM_CHIP}/{PWM_CHANNEL}/enable", os.O_WRONLY)
+    _write_fd(_period_fd, str(period).encode())  # 设置周期
 
-    # 设置周期和占空比
-    with open(f"{PWM_CHIP}/{PWM_CHANNEL}/period", 'w') as f:
-        f.write(str(period))  # 设置周期
 
-    with open(f"{PWM_CHIP}/{PWM_CHANNEL}/duty_cycle", 'w') as f:
-        f.write(str(int(duty)))  # 设置占空比
+def _close_pwm():
+    """程序退出时关闭 PWM 输出、释放文件描述符并取消导出"""
+    global _period_fd, _duty_fd, _enable_fd, _pwm_enabled
+    if _duty_fd is None:
+        return
+    try:
+        _write_fd(_enable_fd, _DISABLE)
+    finally:
+        for fd in (_period_fd, _duty_fd, _enable_fd):
+            os.close(fd)
+        _period_fd = _duty_fd = _enable_fd = None
+        _pwm_enabled = False
+
+        with open(f"{PWM_CHIP}/unexport", 'w') as f:
+            f.write("0")
 
-    # 启动PWM
-    with open(f"{PWM_CHIP}/{PWM_CHANNEL}/enable", 'w') as f:
-        f.write("1")
 
+atexit.register(_close_pwm)
 
-def stop_pwm():
-    with open(f"{PWM_CHIP}/{PWM_CHANNEL}/enable", 'w') as f:
-        f.write("0")
 
-    with open(f"{PWM_CHIP}/unexport", 'w') as f:
-        f.write("0")
+# 初始化 PWM
+def init_pwm(duty, period=1000000):
+    """
+    duty: 占空比
+    period: PWM周期，默认为1000000 (1ms -> 1kHz)
+    """
+    global _pwm_enabled
+    if _duty_fd is None:
+        _open_pwm(period)
+
+    duty = int(duty)
+    data = _DUTY_BYTES.get(duty)
+    if data is None:  # 非整数速度比例，按需编码
+        data = str(duty).encode()
+    _write_fd(_duty_fd, data)  # 设置占空比
+
+    if not _pwm_enabled:
+        _write_fd(_enable_fd, _ENABLE)  # 启动PWM
+        _pwm_enabled = True
+
+
+def stop_pwm():
+    """关闭 PWM 输出；通道保持导出、文件描述符保持打开，以便再次调速时直接写入"""
+    global _last_duty, _pwm_enabled
+    _last_duty = None
+    if _pwm_enabled:
+        _write_fd(_enable_fd, _DISABLE)
+        _pwm_enabled = False
 
 def set_speed(speed_ratio):
     """
@@ -67,9 +146,14 @@ def set_speed(speed_ratio):
                   0% 表示停止电机，100% 表示以最高速度运行电机。
     !!!注意: 在桌面测试时，建议速度比例不要超过30%，以避免损坏设备。
     """
+    global _last_duty
     if speed_ratio > 0 and speed_ratio <= 100:
         # 计算占空比
-        duty = 1000000 * speed_ratio * 0.01 
+        duty = int(1000000 * speed_ratio * 0.01)
+        # 占空比未变化时不重复写入 sysfs
+        if duty == _last_duty:
+            return
+        _last_duty = duty
         init_pwm(duty)
     else:
         # comment: 负数或0 直接停止电机
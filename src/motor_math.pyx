@@ -0,0 +1,41 @@
+# cython: language_level=3, cdivision=True
+"""
+motor_math.pyx
+
+read_gamepad.py 中 calculate_motor_speed 的 Cython 实现，
+映射逻辑与 Python 版本保持一致，去掉了解释器的全局查找和函数调用开销。
+所有参数均为必填的位置参数，与 read_gamepad.py 的调用方式一致。
+(舵机角度在事件处理时直接查 read_gamepad._SERVO_LUT，不需要编译版本。)
+
+编译 (在 src 目录下执行):
+    pip3 install cython
+    cythonize -i motor_math.pyx
+
+编译成功后 read_gamepad.py 会自动优先使用本模块；未编译时仍使用 Python/Numba 版本。
+"""
+
+from libc.math cimport copysign
+
+
+cpdef double calc_motor_speed(double joystick_value,
+                              double deadzone,
+                              double center_speed,
+                              double min_speed,
+                              double max_speed) except? -1.0:
+    """将摇杆值映射为电机速度和方向，参数含义同 calculate_motor_speed"""
+    cdef double clamped_value, abs_value, effective_value
+
+    if deadzone < 0 or deadzone >= 1:
+        raise ValueError("死区值必须在 0 到 1 之间")
+
+    if min_speed < 0 or max_speed <= min_speed:
+        raise ValueError("速度参数无效: max_speed > min_speed >= 0")
+
+    clamped_value = -1.0 if joystick_value < -1.0 else (1.0 if joystick_value > 1.0 else joystick_value)
+    abs_value = clamped_value if clamped_value >= 0 else -clamped_value
+
+    if abs_value <= deadzone:
+        return center_speed
+
+    effective_value = (abs_value - deadzone) / (1.0 - deadzone)
+    return copysign(min_speed + effective_value * (max_speed - min_speed), clamped_value)
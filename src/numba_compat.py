@@ -0,0 +1,19 @@
+"""
+numba_compat.py
+
+可选的 Numba JIT 支持。
+安装了 numba 时导出 numba.njit；否则导出一个不做任何处理的同名装饰器，
+保证在没有 numba 的环境下（例如开发机）代码照常以纯 Python 运行。
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """numba 不可用时的占位装饰器，兼容 @njit 与 @njit(...) 两种写法"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
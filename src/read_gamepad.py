@@ -2,6 +2,13 @@ import pygame
 import sys
 import time
 import math
+import queue
+import logging
+import logging.handlers
+import numpy as np
+
+from evdev_gamepad import EvdevGamepad, ABS_X, ABS_RY
+from numba_compat import njit
 
 # --- 常量定义 ---
 # 手柄轴配置 (这些值可能因手柄型号而异)
@@ -22,9 +29,25 @@ SERVO_MAX_ANGLE = 100
 MOTOR_PWM_PIN = 15  # 电机 PWM 引脚
 MOTOR_DIR_PIN = 13  # 电机方向引脚
 MOTOR_MAX_SPEED = 50  # 电机最大速度 (单位: %)
+MOTOR_DEADZONE = 0.1  # 电机摇杆死区
+
+# evdev 直读模式：设置为手柄的 /dev/input/eventN 后绕过 pygame，直接用 epoll 读取摇杆事件
+# 为 None 时使用 pygame
+EVDEV_DEVICE = None  # 例如 "/dev/input/event2"
+# evdev 轴代码 -> 上面的轴编号
+EVDEV_AXIS_MAP = {ABS_X: LEFT_STICK_X_AXIS, ABS_RY: RIGHT_STICK_Y_AXIS}
 
-# 主循环延迟
-LOOP_DELAY_S = 0.02  # 循环间的等待时间（秒），例如 0.02s = 20ms = 50Hz
+# 主循环等待事件的超时时间
+EVENT_WAIT_TIMEOUT_MS = 100  # 无事件时最长阻塞时间（毫秒），超时后重新检查退出条件
+
+# --- 事件日志 ---
+# 事件处理中的日志先放入队列，由后台线程写到终端，避免在事件循环中同步等待终端输出
+_log_queue = queue.SimpleQueue()
+logger = logging.getLogger("read_gamepad")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+logger.propagate = False
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
 
 # --- 舵机控制模块导入与模拟 ---
 try:
@@ -47,6 +70,10 @@ def init_joystick():
     pygame.init()
     pygame.joystick.init()
 
+    # 只让摇杆轴事件和退出事件进入事件队列，其余事件 (按键、帽子开关、窗口等) 直接丢弃
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed([pygame.JOYAXISMOTION, pygame.QUIT])
+
     joystick_count = pygame.joystick.get_count()
     if joystick_count == 0:
         while True:
@@ -107,9 +134,38 @@ def calculate_servo_angle(joystick_value: float,
     return max(min_angle, min(max_angle, angle))
 
 
+def calculate_servo_angles(joystick_values: np.ndarray,
+                           deadzone: float,
+                           min_angle: float, center_angle: float, max_angle: float) -> np.ndarray:
+    """
+    calculate_servo_angle 的 NumPy 向量化版本，一次映射一批摇杆值。
+    分段逻辑与 calculate_servo_angle 完全一致。
+    """
+    effective_values = (np.abs(joystick_values) - deadzone) / (1.0 - deadzone)
+    angles = np.where(joystick_values < -deadzone,
+                      center_angle + effective_values * (max_angle - center_angle),
+                      np.where(joystick_values > deadzone,
+                               center_angle - effective_values * (center_angle - min_angle),
+                               center_angle))
+    return np.clip(angles, min_angle, max_angle)
+
 
+# 舵机角度查找表：把轴值 [-1.0, 1.0] 量化为 2*_SERVO_LUT_STEPS+1 档，
+# 启动时用向量化映射一次算好每档对应的整数角度，事件处理时只需一次查表
+_SERVO_LUT_STEPS = 2048
+_SERVO_LUT = np.rint(calculate_servo_angles(
+    np.arange(2 * _SERVO_LUT_STEPS + 1) / _SERVO_LUT_STEPS - 1.0,
+    DEADZONE_THRESHOLD,
+    SERVO_MIN_ANGLE,
+    SERVO_CENTER_ANGLE,
+    SERVO_MAX_ANGLE
+)).astype(int).tolist()  # 转为 list，单个元素索引比 ndarray 更快
 
 
+
+
+
+@njit(cache=True)
 def calculate_motor_speed(joystick_value: float, 
                          deadzone: float = 0.1,
                          center_speed: float = 0.0, 
@@ -133,41 +189,49 @@ def calculate_motor_speed(joystick_value: float,
 
     """
     
-    # 参数验证
-    if not isinstance(joystick_value, (int, float)):
-        raise TypeError("摇杆值必须是数字类型")
-    
+    # 参数验证 (摇杆值的类型由 JIT 编译时的类型推断保证)
     if deadzone < 0 or deadzone >= 1:
         raise ValueError("死区值必须在 0 到 1 之间")
     
     if min_speed < 0 or max_speed <= min_speed:
         raise ValueError("速度参数无效: max_speed > min_speed >= 0")
     
-    # 限制摇杆输入值范围到 [-1, 1]
-    joystick_value = max(-1.0, min(1.0, float(joystick_value)))
-    
-    # 获取摇杆值的绝对值和方向
-    abs_value = abs(joystick_value)
-    direction = 1 if joystick_value >= 0 else -1
+    # 限制摇杆输入值范围到 [-1, 1]，并取绝对值 (用条件表达式代替 max/min/abs 调用)
+    joystick_value = float(joystick_value)
+    clamped_value = -1.0 if joystick_value < -1.0 else (1.0 if joystick_value > 1.0 else joystick_value)
+    abs_value = clamped_value if clamped_value >= 0 else -clamped_value
     
     # 死区处理：如果摇杆值在死区范围内，返回中心速度
     if abs_value <= deadzone:
         return center_speed
     
-    # 计算有效摇杆范围 (去除死区后的范围)
-    effective_range = 1.0 - deadzone
-    effective_value = (abs_value - deadzone) / effective_range
-    
-    # 将有效值映射到速度范围 [min_speed, max_speed]
-    speed_range = max_speed - min_speed
-    mapped_speed = min_speed + (effective_value * speed_range)
+    # 去除死区后归一化，并映射到速度范围 [min_speed, max_speed]
+    effective_value = (abs_value - deadzone) / (1.0 - deadzone)
+    mapped_speed = min_speed + effective_value * (max_speed - min_speed)
     
-    # 应用方向并返回结果
-    return direction * mapped_speed
+    # 用摇杆值的符号作为方向: 正值表示正向，负值表示反向
+    return math.copysign(mapped_speed, clamped_value)
 
 
-def main_loop(joystick: pygame.joystick.Joystick):
+# 电机速度映射优先使用 Cython 编译的实现 (见 motor_math.pyx)，未编译时使用上面的 Python/Numba 版本
+try:
+    import motor_math
+except ImportError:
+    motor_math = None
+
+if motor_math is not None:
+    _motor_speed_impl = motor_math.calc_motor_speed
+else:
+    _motor_speed_impl = calculate_motor_speed
+    # 启动时预先触发 JIT 编译，避免第一个摇杆事件承担编译耗时；
+    # 参数个数和类型与事件处理时的调用一致 (全部为 float 位置参数)，否则 numba 会按省略默认值的签名
+    # 另行编译，并且每次调用都走较慢的分派路径
+    # (舵机角度在事件处理时查 _SERVO_LUT，不调用 calculate_servo_angle，无需编译)
+    _motor_speed_impl(0.0, float(MOTOR_DEADZONE), 0.0, 0.0, float(MOTOR_MAX_SPEED))
 
+
+def init_motor() -> MotorController:
+    """创建并初始化电机控制器，失败时退出程序"""
     print(f"\n开始监听左摇杆横向(轴 {LEFT_STICK_X_AXIS})和右摇杆纵向(轴 {RIGHT_STICK_Y_AXIS})的值变化。")
     print(f"左摇杆X控制舵机角度: [{SERVO_MIN_ANGLE}° - {SERVO_MAX_ANGLE}°]，中心 {SERVO_CENTER_ANGLE}°")
     print("按 Ctrl+C 退出程序。")
@@ -180,76 +244,154 @@ def main_loop(joystick: pygame.joystick.Joystick):
         print("由于初始化失败而退出")
         exit(-1)
 
-    running = True
+    return motor
+
+
+def make_axis_handlers(motor: MotorController) -> dict:
+    """
+    生成摇杆轴事件处理函数表 {轴编号: handler(value)}，
+    pygame 与 evdev 两种输入方式共用同一套舵机/电机控制逻辑。
+    """
     last_servo_angle_sent = -1 # 用于减少重复发送相同的舵机角度
     last_motor_speed = 0 # 用于跟踪上次的电机速度
 
+    # 事件处理中用到的全局变量和方法预先绑定为闭包变量，省去每次事件的全局/属性查找
+    servo_lut = _SERVO_LUT
+    servo_lut_steps = _SERVO_LUT_STEPS
+    servo_lut_last = 2 * _SERVO_LUT_STEPS
+    deadzone = DEADZONE_THRESHOLD
+    set_angle = set_servo_angle
+    motor_speed_of = _motor_speed_impl
+    # 电机映射参数全部以 float 位置参数传入，JIT 版本走已编译的快速路径
+    motor_deadzone = float(MOTOR_DEADZONE)
+    motor_max_speed = float(MOTOR_MAX_SPEED)
+    run_forward = motor.run_forward
+    run_reverse = motor.run_reverse
+    stop = motor.stop
+    log_info = logger.info
+
+    # --- 左摇杆横向 (控制舵机) ---
+    def on_left_stick_x(value: float):
+        nonlocal last_servo_angle_sent
+        # 轴值范围 [-1.0, +1.0]；查表代替逐次浮点计算 (轴值量化到 1/_SERVO_LUT_STEPS)
+        # evdev 不保证轴值落在 EVIOCGABS 给出的范围内，越界的下标截断到表的两端
+        index = int((value + 1.0) * servo_lut_steps + 0.5)
+        servo_angle_int = servo_lut[0 if index < 0 else (servo_lut_last if index > servo_lut_last else index)]
+
+        # 仅当角度变化时才发送指令并打印，减少通讯和日志噪音
+        if servo_angle_int != last_servo_angle_sent:
+            set_angle(servo_angle_int)
+            last_servo_angle_sent = servo_angle_int
+            
+            state_desc = "居中"
+            if value < -deadzone:
+                state_desc = f"向左 {value:+.3f}"
+            elif value > deadzone:
+                state_desc = f"向右 {value:+.3f}"
+            
+            log_info(f"[左摇杆 X (轴 {LEFT_STICK_X_AXIS})] 值: {value:+.3f} -> 舵机角度: {servo_angle_int}° ({state_desc})")
+
+    # --- 右摇杆纵向 (控制电机) ---
+    def on_right_stick_y(value: float):
+        nonlocal last_motor_speed
+        motor_speed = int(motor_speed_of(value, motor_deadzone, 0.0, 0.0, motor_max_speed))
+        log_info(f"[右摇杆 Y (轴 {RIGHT_STICK_Y_AXIS})] 值: {value:+.3f} -> 电机速度: {motor_speed:+.2f} (正值表示向前，负值表示向后)")
+        # 仅当电机速度变化时才发送指令并打印，减少通讯和日志噪音
+        if motor_speed != last_motor_speed:
+
+            last_motor_speed = motor_speed
+            if value < -deadzone: # value < 0 表示“向上”
+                run_forward(abs(motor_speed))
+            elif value > deadzone: # value > 0 表示“向下”
+                run_reverse(abs(motor_speed))
+            else:
+                # 在死区内
+                stop() # 停止电机
+
+    return {
+        LEFT_STICK_X_AXIS: on_left_stick_x,
+        RIGHT_STICK_Y_AXIS: on_right_stick_y,
+    }
+
+
+def main_loop(joystick: pygame.joystick.Joystick):
+    motor = init_motor()
+    axis_handlers = make_axis_handlers(motor)
+    _log_listener.start()
+
+    # 循环中用到的函数和常量绑定为局部变量
+    wait_event = pygame.event.wait
+    get_events = pygame.event.get
+    NOEVENT = pygame.NOEVENT
+    QUIT = pygame.QUIT
+    JOYAXISMOTION = pygame.JOYAXISMOTION
+    timeout_ms = EVENT_WAIT_TIMEOUT_MS
+
+    running = True
+
     try:
         while running:
-            for event in pygame.event.get():
-                if event.type == pygame.JOYAXISMOTION:
-                    axis_index = event.axis
-                    value = event.value  # 轴值范围 [-1.0, +1.0]
-
-                    # --- 左摇杆横向 (控制舵机) ---
-                    if axis_index == LEFT_STICK_X_AXIS:
-                        
-                        servo_angle_float = calculate_servo_angle(
-                            value, 
-                            DEADZONE_THRESHOLD,
-                            SERVO_MIN_ANGLE, 
-                            SERVO_CENTER_ANGLE, 
-                            SERVO_MAX_ANGLE
-                        )
-                        servo_angle_int = int(round(servo_angle_float))
-
-                        # 仅当角度变化时才发送指令并打印，减少通讯和日志噪音
-                        if servo_angle_int != last_servo_angle_sent:
-                            set_servo_angle(servo_angle_int)
-                            last_servo_angle_sent = servo_angle_int
-                            
-                            state_desc = "居中"
-                            if value < -DEADZONE_THRESHOLD:
-                                state_desc = f"向左 {value:+.3f}"
-                            elif value > DEADZONE_THRESHOLD:
-                                state_desc = f"向右 {value:+.3f}"
-                            
-                            print(f"[左摇杆 X (轴 {axis_index})] 值: {value:+.3f} -> 舵机角度: {servo_angle_int}° ({state_desc})")
-
-                    # --- 右摇杆纵向 (仅显示信息) ---
-                    elif axis_index == RIGHT_STICK_Y_AXIS:
-                        motor_speed = int(calculate_motor_speed(value))
-                        print(f"[右摇杆 Y (轴 {axis_index})] 值: {value:+.3f} -> 电机速度: {motor_speed:+.2f} (正值表示向前，负值表示向后)")
-                        # 仅当电机速度变化时才发送指令并打印，减少通讯和日志噪音
-                        if motor_speed != last_motor_speed:
-
-                            last_motor_speed = motor_speed
-                            if value < -DEADZONE_THRESHOLD: # value < 0 表示“向上”
-                                motor.run_forward(abs(motor_speed))
-                                state_desc = f"向上 {value:+.3f}"
-                            elif value > DEADZONE_THRESHOLD: # value > 0 表示“向下”
-                                motor.run_reverse(abs(motor_speed))
-                                state_desc = f"向下 {value:+.3f}"
-                            else:
-                                # 在死区内
-                                motor.stop() # 停止电机
-                                pass # state_desc 已经是 "居中"
-            
-            if not running: # 如果内部循环因为 pygame.QUIT 而中断
-                break
-                
-            time.sleep(LOOP_DELAY_S) # 等待一小段时间，降低CPU使用率
+            # 阻塞等待事件，无事件时线程在内核中休眠；超时返回 NOEVENT，保证 Ctrl+C 能及时响应
+            event = wait_event(timeout_ms)
+            if event.type == NOEVENT:
+                continue
+
+            # 一次取出队列中积压的其余事件，同一轴只保留最新值，
+            # 每个轴每轮最多驱动一次舵机/电机 (硬件跟不上更高的更新频率)；
+            # 没有处理函数的轴 (扳机、未使用的摇杆方向) 直接忽略
+            latest_values = {}
+            for event in [event] + get_events():
+                if event.type == QUIT:
+                    running = False
+                elif event.type == JOYAXISMOTION and event.axis in axis_handlers:
+                    latest_values[event.axis] = event.value
+
+            for axis_index, value in latest_values.items():
+                axis_handlers[axis_index](value)
 
     except KeyboardInterrupt:
         print("\n用户手动终止，退出程序。")
     finally:
+        _log_listener.stop()  # 输出队列中剩余的日志
         if joystick:
             joystick.quit()
         pygame.joystick.quit()
         pygame.quit()
         print("Pygame 已安全退出。")
 
+
+def evdev_main_loop(device_path: str):
+    """不经过 pygame，直接用 epoll 等待 evdev 设备上的摇杆事件"""
+    gamepad = EvdevGamepad(device_path, EVDEV_AXIS_MAP)
+    print(f"已打开 evdev 手柄设备：{device_path}")
+
+    motor = init_motor()
+    axis_handlers = make_axis_handlers(motor)
+    _log_listener.start()
+
+    read_axes = gamepad.read_axes
+    timeout_s = EVENT_WAIT_TIMEOUT_MS / 1000
+
+    try:
+        while True:
+            # 同一轴只保留本次读到的最新值
+            latest_values = dict(read_axes(timeout_s))
+            for axis_index, value in latest_values.items():
+                handler = axis_handlers.get(axis_index)
+                if handler:
+                    handler(value)
+
+    except KeyboardInterrupt:
+        print("\n用户手动终止，退出程序。")
+    finally:
+        _log_listener.stop()  # 输出队列中剩余的日志
+        gamepad.close()
+        print("evdev 设备已关闭。")
+
 if __name__ == "__main__":
-    joystick_instance = init_joystick()
-    if joystick_instance: # 确保手柄成功初始化
-        main_loop(joystick_instance)
\ No newline at end of file
+    if EVDEV_DEVICE:
+        evdev_main_loop(EVDEV_DEVICE)
+    else:
+        joystick_instance = init_joystick()
+        if joystick_instance: # 确保手柄成功初始化
+            main_loop(joystick_instance)
@@ -6,12 +6,92 @@ Jetson AGX Orin 电机转速脉冲测量程序
 
 import time
 import threading
-from collections import deque
-import statistics
+import itertools
+import functools
 import numpy as np
-import json
 from datetime import datetime
 
+from numba_compat import njit
+
+# 可选：orjson 用 C 实现编码，保存长时间的转速日志更快；未安装时使用标准库 json
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    import json
+
+    def _dumps(obj):
+        return json.dumps(obj, indent=2).encode()
+
+PULSE_BUFFER_SIZE = 50  # 脉冲间隔环形缓冲区容量
+RPM_HISTORY_SIZE = 100  # 转速历史环形缓冲区容量
+RECENT_INTERVALS = 10   # 每次计算转速使用的最近间隔数
+CALC_PERIOD_S = 0.1     # 转速计算周期 (秒)
+STOPPED_CHECK_TICKS = 5 # 每隔多少个计算周期检查一次停止状态 (0.5 秒)
+HAMPEL_K = 3.0          # Hampel 过滤阈值：偏离中位数超过 K 倍 MAD 视为异常
+MAD_SCALE = 1.4826      # 正态分布下 MAD -> 标准差的换算系数
+
+
+@njit(cache=True)
+def _filtered_median_interval(intervals):
+    """
+    Hampel (MAD) 法过滤异常脉冲间隔后取中位数
+    只需中位数和绝对偏差的中位数，不再计算 Q1/Q3
+
+    Args:
+        intervals: float64 一维数组，至少 1 个元素
+    Returns:
+        float: 过滤后的中位数间隔 (秒)
+    """
+    median_interval = np.median(intervals)
+
+    # 样本足够时剔除偏离中位数过远的间隔
+    if intervals.shape[0] >= 5:
+        deviations = np.abs(intervals - median_interval)
+        mad = np.median(deviations)
+        filtered = intervals[deviations <= HAMPEL_K * MAD_SCALE * mad]
+        if filtered.shape[0] > 0:
+            median_interval = np.median(filtered)
+
+    # 使用中位数间隔计算，更稳定
+    return median_interval
+
+
+class _RingBuffer:
+    """
+    固定容量的 float64 环形缓冲区：预分配连续数组，写入时不分配内存
+
+    单写者无锁发布：只有一个线程 (脉冲中断回调) 调用 append，先写数据槽再递增
+    写序号 _write_seq；读者只读取一次 _write_seq 并据此取出数据。clear 不修改
+    写者的状态，只把读下限 _read_floor 推进到当前写序号，因此读写双方都无需加锁。
+    """
+
+    def __init__(self, capacity):
+        self._data = np.zeros(capacity, dtype=np.float64)
+        self._capacity = capacity
+        self._write_seq = 0   # 累计写入个数，仅由写者修改
+        self._read_floor = 0  # 早于此序号的数据视为已清空，仅由读者修改
+
+    def __len__(self):
+        return min(self._write_seq - self._read_floor, self._capacity)
+
+    def append(self, value):
+        seq = self._write_seq
+        self._data[seq % self._capacity] = value
+        self._write_seq = seq + 1  # 数据写入后再发布
+
+    def recent(self, n):
+        """按时间顺序返回最近 n 个值 (最多为全部有效数据) 的副本"""
+        seq = self._write_seq
+        n = min(n, seq - self._read_floor, self._capacity)
+        return self._data.take(np.arange(seq - n, seq), mode='wrap')
+
+    def clear(self):
+        self._read_floor = self._write_seq
+
+
 class MotorSpeedReader:
     def __init__(self, pin, encoder_ppr=1000, method='jetson_gpio', rpm_range=(0, 6000)):
         """
@@ -33,13 +113,14 @@ class MotorSpeedReader:
         self.max_freq = (self.max_rpm * encoder_ppr) / 60  # Hz
         
         # 存储脉冲间隔
-        self.pulse_intervals = deque(maxlen=50)
-        self.rpm_history = deque(maxlen=100)
+        self.pulse_intervals = _RingBuffer(PULSE_BUFFER_SIZE)
+        self.rpm_history = _RingBuffer(RPM_HISTORY_SIZE)
         
         self.last_pulse_time = 0
         self.current_rpm = 0.0
         self.is_running = False
-        self.lock = threading.Lock()
+        self._stop_evt = threading.Event()  # stop_reading 时唤醒计算线程
+        self.lock = threading.Lock()  # 仅保护 current_rpm / rpm_history 等派生状态
         
         # 动态调整的滤波参数
         self.min_interval = 1.0 / self.max_freq if self.max_freq > 0 else 0.0001  # 最小间隔
@@ -49,6 +130,9 @@ class MotorSpeedReader:
         self.low_speed_threshold = 100  # RPM
         self.stopped_timeout = 2.0  # 秒，超过此时间无脉冲认为停止
         
+        # 脉冲中断回调，start_reading 与 calibrate_encoder_ppr 恢复回调时共用
+        self._pulse_callback = self._make_pulse_callback()
+        
         print(f"电机转速测量初始化:")
         print(f"- 编码器PPR: {encoder_ppr}")
         print(f"- 转速范围: {self.min_rpm}-{self.max_rpm} RPM")
@@ -70,27 +154,38 @@ class MotorSpeedReader:
         except ImportError:
             raise ImportError("请安装Jetson.GPIO: sudo pip3 install Jetson.GPIO")
     
-    def _pulse_callback(self, channel):
-        """脉冲中断回调 - 专门优化用于电机编码器"""
-        current_time = time.perf_counter()
-        
-        with self.lock:
-            if self.last_pulse_time > 0:
-                interval = current_time - self.last_pulse_time
+    def _make_pulse_callback(self):
+        """
+        构建脉冲中断回调 - 专门优化用于电机编码器
+        回调是 pulse_intervals / last_pulse_time 的唯一写者，不获取 self.lock；
+        计时函数、缓冲区写入方法和滤波参数预先绑定为闭包变量，避免每个脉冲的属性查找
+        """
+        perf_counter = time.perf_counter
+        append_interval = self.pulse_intervals.append
+        min_interval = self.min_interval
+        stopped_timeout = self.stopped_timeout
+        reader = self
+
+        def pulse_callback(channel):
+            current_time = perf_counter()
+            last_pulse_time = reader.last_pulse_time
+            
+            if last_pulse_time > 0:
+                interval = current_time - last_pulse_time
                 
-                # 验证间隔是否在合理范围内
-                if self.min_interval <= interval <= self.max_interval:
-                    self.pulse_intervals.append(interval)
-                elif interval > self.max_interval:
-                    # 可能是低速或停止状态
-                    if interval < self.stopped_timeout:
-                        self.pulse_intervals.append(interval)
+                # 验证间隔是否在合理范围内；超过 max_interval 的低速间隔同样保留，
+                # 异常值交给计算线程中的 Hampel 过滤处理
+                if min_interval <= interval < stopped_timeout:
+                    append_interval(interval)
             
-            self.last_pulse_time = current_time
+            reader.last_pulse_time = current_time
+
+        return pulse_callback
     
     def start_reading(self):
         """开始转速测量"""
         self.is_running = True
+        self._stop_evt.clear()
         
         # 根据最高转速计算防抖时间
         bounce_time = max(1, int(30000 / self.max_freq))  # 动态防抖
@@ -109,48 +204,29 @@ class MotorSpeedReader:
         self.calc_thread = threading.Thread(target=self._calculate_rpm)
         self.calc_thread.daemon = True
         self.calc_thread.start()
-        
-        # 启动低速监控线程
-        self.monitor_thread = threading.Thread(target=self._monitor_stopped)
-        self.monitor_thread.daemon = True
-        self.monitor_thread.start()
     
     def _calculate_rpm(self):
-        """计算转速"""
+        """计算转速，并每隔 STOPPED_CHECK_TICKS 个周期监控一次电机停止状态"""
+        tick = 0
         while self.is_running:
-            time.sleep(0.1)  # 100ms更新频率
+            if self._stop_evt.wait(CALC_PERIOD_S):  # 100ms更新频率，停止时立即退出
+                break
+            tick += 1
+            if tick % STOPPED_CHECK_TICKS == 0:
+                self._check_stopped()
             
             with self.lock:
                 if len(self.pulse_intervals) >= 3:
-                    intervals = list(self.pulse_intervals)
+                    # 高速时使用更多样本，提高精度
+                    recent_intervals = self.pulse_intervals.recent(RECENT_INTERVALS)
                     
-                    # 根据转速范围选择不同的计算策略
-                    if len(intervals) >= 10:
-                        # 高速时使用更多样本，提高精度
-                        recent_intervals = intervals[-10:]
-                    else:
-                        recent_intervals = intervals
-                    
-                    # 异常值过滤
-                    if len(recent_intervals) >= 5:
-                        # 使用四分位数方法过滤异常值
-                        sorted_intervals = sorted(recent_intervals)
-                        q1 = np.percentile(sorted_intervals, 25)
-                        q3 = np.percentile(sorted_intervals, 75)
-                        iqr = q3 - q1
-                        
-                        filtered_intervals = [x for x in recent_intervals 
-                                            if q1 - 1.5*iqr <= x <= q3 + 1.5*iqr]
-                        
-                        if filtered_intervals:
-                            recent_intervals = filtered_intervals
+                    # 异常值过滤 + 中位数
+                    median_interval = _filtered_median_interval(recent_intervals)
                     
                     # 计算转速
-                    if recent_intervals:
-                        # 使用中位数间隔计算，更稳定
-                        median_interval = statistics.median(recent_intervals)
+                    if median_interval > 0:
                         frequency = 1.0 / median_interval
-                        rpm = (frequency * 60) / self.encoder_ppr
+                        rpm = float(frequency * 60 / self.encoder_ppr)  # 无 numba 时中位数为 numpy.float64，统一转换为 float
                         
                         # 转速范围检查
                         if self.min_rpm <= rpm <= self.max_rpm:
@@ -166,20 +242,17 @@ class MotorSpeedReader:
                         if (current_time - self.last_pulse_time) > self.stopped_timeout:
                             self.current_rpm = 0.0
     
-    def _monitor_stopped(self):
-        """监控电机停止状态"""
-        while self.is_running:
-            time.sleep(0.5)
+    def _check_stopped(self):
+        """检查电机停止状态，由计算线程定期调用"""
+        current_time = time.perf_counter()
+        if self.last_pulse_time > 0:
+            time_since_last_pulse = current_time - self.last_pulse_time
             
-            current_time = time.perf_counter()
-            if self.last_pulse_time > 0:
-                time_since_last_pulse = current_time - self.last_pulse_time
-                
-                # 如果长时间无脉冲，认为电机已停止
-                if time_since_last_pulse > self.stopped_timeout:
-                    with self.lock:
-                        self.current_rpm = 0.0
-                        self.pulse_intervals.clear()
+            # 如果长时间无脉冲，认为电机已停止
+            if time_since_last_pulse > self.stopped_timeout:
+                with self.lock:
+                    self.current_rpm = 0.0
+                    self.pulse_intervals.clear()
     
     def get_rpm(self):
         """获取当前转速"""
@@ -187,37 +260,40 @@ class MotorSpeedReader:
     
     def get_detailed_stats(self):
         """获取详细转速统计"""
+        # 锁内只复制最近读数和当前转速，统计计算在锁外进行
         with self.lock:
-            if len(self.rpm_history) < 3:
-                return {
-                    'current_rpm': self.current_rpm,
-                    'samples': len(self.rpm_history),
-                    'status': 'Initializing' if self.current_rpm > 0 else 'Stopped'
-                }
-            
-            recent_rpms = list(self.rpm_history)[-20:]  # 最近20个读数
-            
+            current_rpm = float(self.current_rpm)
+            recent_rpms = self.rpm_history.recent(20)  # 最近20个读数
+        
+        samples = len(recent_rpms)
+        if samples < 3:
             return {
-                'current_rpm': self.current_rpm,
-                'avg_rpm': statistics.mean(recent_rpms),
-                'median_rpm': statistics.median(recent_rpms),
-                'std_rpm': statistics.stdev(recent_rpms) if len(recent_rpms) > 1 else 0,
-                'min_rpm': min(recent_rpms),
-                'max_rpm': max(recent_rpms),
-                'samples': len(recent_rpms),
-                'pulse_frequency': (self.current_rpm * self.encoder_ppr) / 60,
-                'stability_percent': self._calculate_stability(recent_rpms),
-                'status': self._get_motor_status()
+                'current_rpm': current_rpm,
+                'samples': samples,
+                'status': 'Initializing' if current_rpm > 0 else 'Stopped'
             }
+        
+        mean_rpm = float(recent_rpms.mean())
+        std_rpm = float(recent_rpms.std(ddof=1)) if samples > 1 else 0
+        
+        return {
+            'current_rpm': current_rpm,
+            'avg_rpm': mean_rpm,
+            'median_rpm': float(np.median(recent_rpms)),
+            'std_rpm': std_rpm,
+            'min_rpm': float(recent_rpms.min()),
+            'max_rpm': float(recent_rpms.max()),
+            'samples': samples,
+            'pulse_frequency': (current_rpm * self.encoder_ppr) / 60,
+            'stability_percent': self._calculate_stability(mean_rpm, std_rpm, samples),
+            'status': self._get_motor_status(current_rpm)
+        }
     
-    def _calculate_stability(self, rpm_values):
-        """计算转速稳定性百分比"""
-        if len(rpm_values) < 5:
+    def _calculate_stability(self, mean_rpm, std_rpm, samples):
+        """根据已算出的均值和标准差计算转速稳定性百分比"""
+        if samples < 5:
             return 0.0
         
-        mean_rpm = statistics.mean(rpm_values)
-        std_rpm = statistics.stdev(rpm_values)
-        
         if mean_rpm > 0:
             cv = (std_rpm / mean_rpm) * 100
             stability = max(0, 100 - cv)  # 变异系数越小，稳定性越高
@@ -225,13 +301,13 @@ class MotorSpeedReader:
         
         return 0.0
     
-    def _get_motor_status(self):
+    def _get_motor_status(self, current_rpm):
         """获取电机状态"""
-        if self.current_rpm == 0:
+        if current_rpm == 0:
             return "Stopped"
-        elif self.current_rpm < self.low_speed_threshold:
+        elif current_rpm < self.low_speed_threshold:
             return "Low Speed"
-        elif self.current_rpm > self.max_rpm * 0.9:
+        elif current_rpm > self.max_rpm * 0.9:
             return "High Speed"
         else:
             return "Normal"
@@ -241,12 +317,11 @@ class MotorSpeedReader:
         print(f"开始PPR校准，请确保电机以 {known_rpm} RPM 稳定运行...")
         print(f"校准时间: {duration} 秒")
         
-        pulse_count = 0
         start_time = time.perf_counter()
         
-        def calibration_callback(channel):
-            nonlocal pulse_count
-            pulse_count += 1
+        # 回调直接调用 C 实现的 next(counter, channel)，每个脉冲不进入 Python 函数帧
+        counter = itertools.count()
+        calibration_callback = functools.partial(next, counter)
         
         # 临时设置校准回调
         self.GPIO.remove_event_detect(self.pin)
@@ -261,6 +336,7 @@ class MotorSpeedReader:
                                  callback=self._pulse_callback, bouncetime=1)
         
         actual_time = time.perf_counter() - start_time
+        pulse_count = next(counter)  # 计数器下一个值即已计数的脉冲数
         calculated_ppr = (pulse_count * 60) / (known_rpm * actual_time)
         
         print(f"校准结果:")
@@ -281,22 +357,58 @@ class MotorSpeedReader:
             'timestamp': datetime.now().isoformat(),
             'encoder_ppr': self.encoder_ppr,
             'rpm_range': [self.min_rpm, self.max_rpm],
-            'rpm_history': list(self.rpm_history),
+            'rpm_history': self.rpm_history.recent(len(self.rpm_history)).tolist(),
             'current_stats': self.get_detailed_stats()
         }
         
-        with open(filename, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(_dumps(log_data))
         
         print(f"数据已保存到: {filename}")
     
     def stop_reading(self):
         """停止测量"""
         self.is_running = False
+        self._stop_evt.set()
         self.GPIO.remove_event_detect(self.pin)
         self.GPIO.cleanup()
         print("转速测量已停止")
 
+@njit(cache=True)
+def _rpm_step(raw_rpm, last_raw_rpm, filtered_rpm, alpha, deadband):
+    """
+    单个样本的 死区 + 低通 滤波
+
+    Returns:
+        tuple: (filtered_rpm, last_raw_rpm) 更新后的滤波器状态
+    """
+    # 死区滤波
+    if abs(raw_rpm - last_raw_rpm) < deadband:
+        raw_rpm = last_raw_rpm
+
+    # 低通滤波
+    if filtered_rpm == 0:
+        filtered_rpm = raw_rpm
+    else:
+        filtered_rpm = alpha * raw_rpm + (1 - alpha) * filtered_rpm
+
+    return filtered_rpm, raw_rpm
+
+
+@njit(cache=True)
+def _rpm_filter_batch(raw_rpms, out, last_raw_rpm, filtered_rpm, alpha, deadband):
+    """
+    逐个样本执行 _rpm_step，结果写入 out
+
+    Returns:
+        tuple: (filtered_rpm, last_raw_rpm) 处理完整批样本后的滤波器状态
+    """
+    for i in range(raw_rpms.shape[0]):
+        filtered_rpm, last_raw_rpm = _rpm_step(raw_rpms[i], last_raw_rpm, filtered_rpm, alpha, deadband)
+        out[i] = filtered_rpm
+    return filtered_rpm, last_raw_rpm
+
+
 class RPMFilter:
     """转速滤波器 - 专门用于电机转速平滑"""
     
@@ -313,18 +425,26 @@ class RPMFilter:
     
     def filter(self, raw_rpm):
         """滤波处理"""
-        # 死区滤波
-        if abs(raw_rpm - self.last_raw_rpm) < self.deadband:
-            raw_rpm = self.last_raw_rpm
-        
-        # 低通滤波
-        if self.filtered_rpm == 0:
-            self.filtered_rpm = raw_rpm
-        else:
-            self.filtered_rpm = self.alpha * raw_rpm + (1 - self.alpha) * self.filtered_rpm
-        
-        self.last_raw_rpm = raw_rpm
+        self.filtered_rpm, self.last_raw_rpm = _rpm_step(
+            float(raw_rpm), float(self.last_raw_rpm), float(self.filtered_rpm),
+            float(self.alpha), float(self.deadband))
         return self.filtered_rpm
+    
+    def filter_batch(self, raw_rpms):
+        """
+        批量滤波处理，结果与逐个调用 filter() 相同
+        
+        Args:
+            raw_rpms: 按时间顺序排列的原始转速序列
+        Returns:
+            np.ndarray: 每个样本对应的滤波后转速
+        """
+        raw_rpms = np.asarray(raw_rpms, dtype=np.float64)
+        filtered = np.empty_like(raw_rpms)
+        self.filtered_rpm, self.last_raw_rpm = _rpm_filter_batch(
+            raw_rpms, filtered, float(self.last_raw_rpm), float(self.filtered_rpm),
+            float(self.alpha), float(self.deadband))
+        return filtered
 
 def main():
     """主函数"""
@@ -2,7 +2,8 @@
 servo_pwm.py
 
 在 Jetson AGX Orin 的物理引脚 13（BOARD 编号）上输出 50Hz PWM 控制舵机转动。
-提供一个 set_servo_angle(angle) 函数，angle 范围 0-180 度。
+提供一个 set_servo_angle(angle) 函数，angle 范围 0-180 度；
+多个舵机可通过 get_servo(pin) 获取各自的 ServoPWM 实例，同一引脚只初始化一次。
 
 注意：
     - 确保物理引脚 13 已在设备树/Jetson-IO 中复用为 PWM 模式。
@@ -21,6 +22,12 @@ ANGLE_MIN     = 0       # 舵机最小角度
 ANGLE_MAX     = 180     # 舵机最大角度
 DUTY_MIN      = 2.5     # 0° 时的占空比（%）
 DUTY_MAX      = 12.5    # 180° 时的占空比（%）
+SERVO_SLEW_DEG_PER_S = 300.0   # 舵机转速（°/s），常见舵机约 0.1s/60° 即 600°/s，这里取保守值
+SERVO_SETTLE_S       = 0.05    # 到位后的额外稳定时间（秒）
+
+# 线性映射的斜率与截距，导入时计算一次
+_SLOPE       = (DUTY_MAX - DUTY_MIN) / (ANGLE_MAX - ANGLE_MIN)
+_DUTY_OFFSET = DUTY_MIN - _SLOPE * ANGLE_MIN
 # ——————————————————————————————————————————————————————————————————————————————————
 
 
@@ -32,12 +39,10 @@ def angle_to_duty_cycle(angle: float) -> float:
     返回:
         duty: float，对应的 PWM 占空比（单位 %）
     """
-    if angle < ANGLE_MIN or angle > ANGLE_MAX:
+    if not ANGLE_MIN <= angle <= ANGLE_MAX:
         raise ValueError(f"angle 必须在 [{ANGLE_MIN}, {ANGLE_MAX}] 之间，收到: {angle}")
     # 线性映射：angle=0 -> duty=DUTY_MIN，angle=180 -> duty=DUTY_MAX
-    duty_range = DUTY_MAX - DUTY_MIN
-    duty = DUTY_MIN + (duty_range) * (angle - ANGLE_MIN) / (ANGLE_MAX - ANGLE_MIN)
-    return duty
+    return _DUTY_OFFSET + _SLOPE * angle
 
 
 def initialize_pwm(pin_board: int, freq_hz: int) -> GPIO.PWM:
@@ -66,51 +71,110 @@ def cleanup_pwm(pwm: GPIO.PWM):
     GPIO.cleanup()
 
 
-_pwm_servo = None
+# 已初始化的舵机实例：BOARD 引脚号 -> ServoPWM，同一引脚只初始化一次
+_instances = {}
+
+
+class ServoPWM:
+    def __init__(self, pin_board: int, freq_hz: int = PWM_FREQ_HZ):
+        """
+        在指定引脚上初始化舵机 PWM 输出，并登记到 _instances；一般通过 get_servo() 获取。
+        参数:
+            pin_board: int，物理 BOARD 编号
+            freq_hz: int，PWM 频率 (Hz)
+        异常:
+            ValueError: 该引脚已有舵机实例，同一引脚不允许重复初始化
+        """
+        if pin_board in _instances:
+            raise ValueError(f"引脚 {pin_board} 已初始化，请使用 get_servo({pin_board}) 获取已有实例")
+        print(f"PWM 首次初始化，引脚 {pin_board}")
+        self.pin = pin_board
+        self._pwm = initialize_pwm(pin_board, freq_hz)
+        self._last_angle = None   # 上一次设定的角度，用于估算转动时间
+        _instances[pin_board] = self
 
-def set_servo_angle(angle: float):
+        # 这里的短暂 sleep 是为了确保 PWM 初始化后稳定，可以保留或调整
+        time.sleep(0.1)
+
+    def travel_time(self, angle: float) -> float:
+        """
+        估算舵机从上一次设定角度转到 angle 所需的时间。
+        参数:
+            angle: float，舵机目标角度
+        返回:
+            float，预计到位时间（秒）；尚未设定过角度时按满行程估算
+        """
+        if self._last_angle is None:
+            delta = ANGLE_MAX - ANGLE_MIN
+        else:
+            delta = abs(angle - self._last_angle)
+        return delta / SERVO_SLEW_DEG_PER_S + SERVO_SETTLE_S
+
+    def set_angle(self, angle: float) -> float:
+        """
+        将舵机转到指定角度（0~180），不等待舵机到位。
+        参数:
+            angle: float，舵机目标角度，范围 [0, 180]
+        返回:
+            float，按转速估算的到位时间（秒）
+        """
+        # 对于50Hz，0度约2.5% (0.5ms)，90度约7.5% (1.5ms)，180度约12.5% (2.5ms)
+        duty = angle_to_duty_cycle(angle)
+        travel_time = self.travel_time(angle)
+        self._pwm.ChangeDutyCycle(duty)
+        self._last_angle = angle
+        print(f"PWM ChangeDutyCycle to {duty:.2f} for angle {angle:.1f}°")
+        return travel_time
+
+    def close(self):
+        """
+        停止本引脚的 PWM 输出；最后一个舵机关闭时才调用 GPIO.cleanup()，
+        避免清理掉其它仍在使用的引脚。
+        """
+        if _instances.get(self.pin) is not self:
+            return  # 已关闭
+        del _instances[self.pin]
+        self._pwm.stop()
+        if not _instances:
+            GPIO.cleanup()
+
+
+def get_servo(pin_board: int = PWM_PIN_BOARD) -> ServoPWM:
     """
-    将舵机转到指定角度（0~180）。
-    首次调用时，会自动初始化 PWM 输出；随后调用只改变占空比。
+    获取指定引脚的舵机实例，首次获取时初始化 PWM 输出。
     参数:
-        angle: float，舵机目标角度，范围 [0, 180]
+        pin_board: int，物理 BOARD 编号，默认 PWM_PIN_BOARD
+    返回:
+        ServoPWM，该引脚唯一的舵机实例
     """
-    global _pwm_servo
-    # 第一次调用时，初始化 PWM
-    if _pwm_servo is None:
-        # 假设 initialize_pwm 和 angle_to_duty_cycle 是你已有的函数
-        # from your_pwm_setup_module import initialize_pwm, PWM_PIN_BOARD, PWM_FREQ_HZ 
-        # from your_angle_converter import angle_to_duty_cycle
-        
-        # 示例占位：你需要用实际的函数替换
-        # _pwm_servo = initialize_pwm(PWM_PIN_BOARD, PWM_FREQ_HZ)
-        print("PWM 首次初始化 (模拟)") # 替换为实际的初始化
-        _pwm_servo = initialize_pwm(PWM_PIN_BOARD, PWM_FREQ_HZ)
-        
-        # 这里的短暂 sleep 是为了确保 PWM 初始化后稳定，可以保留或调整
-        time.sleep(0.1) 
+    servo = _instances.get(pin_board)
+    if servo is None:
+        servo = ServoPWM(pin_board)
+    return servo
 
-    # 将角度转换为占空比
-    duty = angle_to_duty_cycle(angle) # 确保你有这个函数
-    # 对于50Hz，0度约2.5% (0.5ms)，90度约7.5% (1.5ms)，180度约12.5% (2.5ms)
-    
 
-    if _pwm_servo: # 确保 _pwm_servo 已被初始化
-        _pwm_servo.ChangeDutyCycle(duty)
-        print(f"(模拟) PWM ChangeDutyCycle to {duty:.2f} for angle {angle:.1f}°") # 替换为实际的调用
-    else:
-        print("错误: _pwm_servo 未初始化！")
+def set_servo_angle(angle: float) -> float:
+    """
+    将 PWM_PIN_BOARD 上的舵机转到指定角度（0~180）。
+    首次调用时，会自动初始化 PWM 输出；随后调用只改变占空比。
+    本函数不等待舵机到位，需要等待时由调用方根据返回值决定。
+    参数:
+        angle: float，舵机目标角度，范围 [0, 180]
+    返回:
+        float，按转速估算的到位时间（秒）
+    """
+    return get_servo().set_angle(angle)
 
 
 
 if __name__ == "__main__":
     try:
-        set_servo_angle(45)    # 设置舵机到 45°
-        time.sleep(0.2)  # 等待舵机到位
+        travel_time = set_servo_angle(45)    # 设置舵机到 45°
+        time.sleep(travel_time)  # 按转动角度等待舵机到位
 
         print("测试结束，退出并清理 GPIO。")
     except KeyboardInterrupt:
         print("用户中断，退出并清理 GPIO。")
     finally:
-        if _pwm_servo is not None:
-            cleanup_pwm(_pwm_servo)
+        for servo in list(_instances.values()):
+            servo.close()